@@ -0,0 +1,60 @@
+"""Compare json vs msgpack Socket.IO packets for a chat message fan-out.
+
+Run from the project root:  python -m benchmarks.wire_fanout --recipients 500
+"""
+
+import argparse
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from socketio import packet
+from core.wire import CompactPacket, JsonCodec
+
+
+def sample_message() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "id": uuid.uuid4(),
+        "conversation_id": uuid.uuid4(),
+        "sender_id": uuid.uuid4(),
+        "content": "hey, are we still on for tomorrow?",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def run(packet_class, payload, rounds: int):
+    # the fan-out manager encodes once per wire format and hands the same
+    # frame to every recipient, so the encode is the cpu cost of an emit
+    start = time.process_time()
+    for _ in range(rounds):
+        encoded = packet_class(
+            packet.EVENT, namespace="/", data=["message", payload]
+        ).encode()
+    cpu = time.process_time() - start
+    raw = encoded.encode() if isinstance(encoded, str) else encoded
+    return len(raw), len(zlib.compress(raw)), cpu / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10_000)
+    args = parser.parse_args()
+
+    packet.Packet.json = JsonCodec
+    payload = sample_message()
+
+    print(f"{'format':<10}{'bytes':>8}{'deflated':>10}{'bytes/emit':>14}{'us cpu/emit':>14}")
+    for name, packet_class in (("json", packet.Packet), ("msgpack", CompactPacket)):
+        size, deflated, cpu = run(packet_class, payload, args.rounds)
+        print(
+            f"{name:<10}{size:>8}{deflated:>10}"
+            f"{size * args.recipients:>14}{cpu * 1e6:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,13 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: str = ""  # comma separated, empty = no replicas
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_PRE_PING: bool = True
+    DB_REPLICA_STICKY_SECONDS: float = 5.0  # read from primary after a user writes
 
     # Security
     SECRET_KEY: str
@@ -13,11 +20,59 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Redis (socket.io pub/sub, token revocation)
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # request path calls, fail fast
+
+    # Token revocation
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_RESYNC_SECONDS: int = 60
+
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
 
+    # Socket.IO
+    SOCKETIO_COMPACT_WIRE: bool = True  # allow clients to opt in to msgpack
+    SOCKETIO_HTTP_COMPRESSION: bool = True
+    SOCKETIO_COMPRESSION_THRESHOLD: int = 1024  # bytes
+
+    # Socket.IO outbound queues (per connection)
+    SOCKETIO_QUEUE_MAX_MESSAGES: int = 500
+    SOCKETIO_QUEUE_MAX_BYTES: int = 1_048_576
+    # applied in order once a queue is over its caps
+    SOCKETIO_SLOW_CONSUMER_POLICY: str = "drop_ephemeral,merge_state,disconnect"
+    SOCKETIO_EPHEMERAL_EVENTS: str = "typing,stop_typing"  # safe to drop
+    SOCKETIO_STATE_EVENTS: str = "presence"  # only the latest one matters
+    SOCKETIO_TRANSPORT_HIGH_WATER: int = 32  # packets in the engine.io queue
+    SOCKETIO_QUEUE_POLL_SECONDS: float = 0.05
+    SOCKETIO_RESUME_RETRY_SECONDS: int = 5
+
+    # Socket message send dedup (client generated ids)
+    SEND_DEDUP_WINDOW_SECONDS: int = 300
+    SEND_DEDUP_CLAIM_SECONDS: int = 15  # pending claim, expires if the node dies
+    SEND_DEDUP_PER_USER: int = 256  # client ids remembered per user, in process
+    SEND_DEDUP_MAX_USERS: int = 10_000
+    SEND_DEDUP_WAIT_ATTEMPTS: int = 20  # x 0.1s, while another node sends it
+
+    # Chat attachments
+    ATTACHMENT_STORAGE_DIR: str = "storage/attachments"
+    ATTACHMENT_MAX_BYTES: int = 100 * 1024 * 1024
+    ATTACHMENT_GC_GRACE_SECONDS: int = 3600  # unreferenced blobs younger than this are kept
+
+    # Graceful drain
+    DRAIN_WINDOW_SECONDS: int = 30  # client reconnects are spread over this
+    DRAIN_FLUSH_TIMEOUT_SECONDS: int = 5  # per client, for its outbound queue
+    DRAIN_EXIT_TIMEOUT_SECONDS: int = 60  # exit anyway after this
+    # signal name (e.g. "SIGRTMIN") that starts a drain, off by default:
+    # SIGUSR1/SIGUSR2/SIGHUP are already used by gunicorn and uvicorn workers
+    DRAIN_SIGNAL: str = ""
+
+    # Admin endpoints (disabled when empty)
+    ADMIN_TOKEN: str = ""
+
     # Application
     APP_NAME: str = "Realtime Chat API"
     APP_VERSION: str = "1.0.0"
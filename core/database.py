@@ -1,15 +1,100 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from core.config import get_settings
 
 settings = get_settings()
 
-# Create the Engine
-engine = create_engine(settings.DATABASE_URL)
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,  # drop connections killed by the server/proxy
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+# Create the Engine (primary, every write goes here)
+engine = _create_engine(settings.DATABASE_URL)
+
+# Optional read replicas, used round robin for reads that opt in with use_replica()
+replica_engines = [
+    _create_engine(url.strip())
+    for url in settings.DATABASE_REPLICA_URLS.split(",")
+    if url.strip()
+]
+_replicas = itertools.cycle(replica_engines) if replica_engines else None
+
+# user id -> monotonic time of their last commit on this worker
+# (read-your-writes: we keep reading from the primary until replicas caught up)
+_last_write: dict[str, float] = {}
+_PRUNE_EVERY = 1000  # commits between sweeps of expired _last_write entries
+_writes_since_prune = 0
+
+
+def recently_wrote(user_id) -> bool:
+    if user_id is None:
+        return False
+    last = _last_write.get(str(user_id))
+    if last is None:
+        return False
+    if time.monotonic() - last > settings.DB_REPLICA_STICKY_SECONDS:
+        _last_write.pop(str(user_id), None)
+        return False
+    return True
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            _replicas is not None
+            and self.info.get("use_replica")
+            and not self._flushing
+            and not recently_wrote(self.info.get("user_id"))
+        ):
+            return next(_replicas)
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flag_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_to_primary(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id"):
+        global _writes_since_prune
+        now = time.monotonic()
+        _last_write[str(session.info["user_id"])] = now
+        _writes_since_prune += 1
+        if _writes_since_prune >= _PRUNE_EVERY:
+            _writes_since_prune = 0
+            # users who never read again would otherwise stay here forever
+            for user_id, at in _last_write.copy().items():
+                if now - at > settings.DB_REPLICA_STICKY_SECONDS:
+                    _last_write.pop(user_id, None)
+
+
+@contextmanager
+def use_replica(db: Session):
+    """Route the queries made inside the block to a read replica (if any)."""
+    previous = db.info.get("use_replica", False)
+    db.info["use_replica"] = True
+    try:
+        yield db
+    finally:
+        db.info["use_replica"] = previous
+
 
 # 3. Create SessionLocal Class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
 # 4. Create the Base Class
 # All your database models will inherit from this class
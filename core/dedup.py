@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+import redis
+import redis.asyncio as aioredis
+from core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "dedup:"
+PENDING = "__pending__:"  # + per claim token
+
+# compare-and-delete: drop the key only if it still holds this claim
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SendDedup:
+    """Remembers the ack of recently sent messages per (user, client id).
+
+    Lookups hit an in-process LRU first (bounded per user and in number of
+    users), then redis, which also lets a node claim a client id so a retry
+    landing on another node while the first attempt is still running does
+    not insert the message twice. The claim only lives
+    ``SEND_DEDUP_CLAIM_SECONDS`` (a node dying mid-send does not block
+    retries for the whole window); the stored ack gets the full window.
+    """
+
+    def __init__(self, url: str):
+        self.redis = aioredis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        # user_id -> OrderedDict(client_id -> (ack, stored_at))
+        self.local: OrderedDict[str, OrderedDict] = OrderedDict()
+        # (user_id, client_id) -> (claim token, done event) for the sends
+        # running in this process; also guards against double inserts on
+        # this node while redis is unavailable
+        self.in_flight: dict[tuple[str, str], tuple[str, asyncio.Event]] = {}
+
+    @staticmethod
+    def _key(user_id: str, client_id: str) -> str:
+        return f"{KEY_PREFIX}{user_id}:{client_id}"
+
+    def _get_local(self, user_id: str, client_id: str):
+        window = self.local.get(user_id)
+        if window is None or client_id not in window:
+            return None
+        ack, stored_at = window[client_id]
+        if time.monotonic() - stored_at > settings.SEND_DEDUP_WINDOW_SECONDS:
+            del window[client_id]
+            return None
+        return ack
+
+    def _remember_local(self, user_id: str, client_id: str, ack: dict) -> None:
+        window = self.local.setdefault(user_id, OrderedDict())
+        self.local.move_to_end(user_id)
+        window[client_id] = (ack, time.monotonic())
+        window.move_to_end(client_id)
+        while len(window) > settings.SEND_DEDUP_PER_USER:
+            window.popitem(last=False)
+        while len(self.local) > settings.SEND_DEDUP_MAX_USERS:
+            self.local.popitem(last=False)
+
+    async def _wait_local(self, user_id: str, client_id: str):
+        # same wait as for a claim held by another node, without redis
+        done = self.in_flight[(user_id, client_id)][1]
+        try:
+            await asyncio.wait_for(
+                done.wait(), timeout=settings.SEND_DEDUP_WAIT_ATTEMPTS * 0.1
+            )
+        except asyncio.TimeoutError:
+            return False, None
+        ack = self._get_local(user_id, client_id)
+        if ack is not None:
+            return False, ack
+        # the first attempt failed and released the claim
+        return await self.claim(user_id, client_id)
+
+    def _own(self, user_id: str, client_id: str, token: str):
+        self.in_flight[(user_id, client_id)] = (token, asyncio.Event())
+        return True, None
+
+    def _disown(self, user_id: str, client_id: str) -> str | None:
+        token, done = self.in_flight.pop((user_id, client_id), (None, None))
+        if done is not None:
+            done.set()
+        return token
+
+    async def claim(self, user_id: str, client_id: str):
+        """Return ``(True, None)`` if this call owns the send, else
+        ``(False, ack)`` with the original ack (``None`` if still running).
+        """
+        ack = self._get_local(user_id, client_id)
+        if ack is not None:
+            return False, ack
+        if (user_id, client_id) in self.in_flight:
+            return await self._wait_local(user_id, client_id)
+
+        key = self._key(user_id, client_id)
+        token = f"{PENDING}{uuid.uuid4().hex}"
+        try:
+            if await self.redis.set(
+                key, token, nx=True, ex=settings.SEND_DEDUP_CLAIM_SECONDS
+            ):
+                return self._own(user_id, client_id, token)
+
+            # someone else has it, wait a little for their ack
+            for _ in range(settings.SEND_DEDUP_WAIT_ATTEMPTS):
+                stored = await self.redis.get(key)
+                if stored is None:
+                    # their attempt failed and released the claim
+                    return await self.claim(user_id, client_id)
+                if not stored.startswith(PENDING):
+                    ack = json.loads(stored)
+                    self._remember_local(user_id, client_id, ack)
+                    return False, ack
+                await asyncio.sleep(0.1)
+            return False, None
+        except redis.RedisError:
+            # better a rare duplicate than refusing to send
+            logger.warning("dedup redis unavailable, using the local window only")
+            ack = self._get_local(user_id, client_id)
+            if ack is not None:
+                return False, ack
+            if (user_id, client_id) in self.in_flight:
+                return await self._wait_local(user_id, client_id)
+            return self._own(user_id, client_id, token)
+
+    async def complete(self, user_id: str, client_id: str, ack: dict) -> None:
+        self._remember_local(user_id, client_id, ack)
+        self._disown(user_id, client_id)
+        try:
+            await self.redis.set(
+                self._key(user_id, client_id),
+                json.dumps(ack),
+                ex=settings.SEND_DEDUP_WINDOW_SECONDS,
+            )
+        except redis.RedisError:
+            logger.warning("could not store send ack in redis")
+
+    async def release(self, user_id: str, client_id: str) -> None:
+        # the send failed, let the client's retry go through. Only our own
+        # claim is deleted: if it expired, the key may now hold another
+        # node's claim or ack
+        token = self._disown(user_id, client_id)
+        if token is None:
+            return
+        try:
+            await self.redis.eval(RELEASE_SCRIPT, 1, self._key(user_id, client_id), token)
+        except redis.RedisError:
+            pass
+
+
+send_dedup = SendDedup(settings.REDIS_URL)
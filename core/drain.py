@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import random
+import signal
+from urllib.parse import parse_qs
+from core.config import get_settings
+from core.socket_manager import sio
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class NodeDrain:
+    """Take this node out of rotation without dropping every socket at once.
+
+    Once started: new engine.io handshakes get a 503 (see ``guard``), each
+    connected client is asked to reconnect at its own slot spread over
+    ``DRAIN_WINDOW_SECONDS`` after its outbound queue is flushed, and the
+    process is sent SIGTERM when no connection is left.
+
+    Draining is per process, so it drains a node only when the node runs a
+    single worker: scale with more nodes, not ``--workers``. Under a
+    supervisor (``uvicorn --workers``, gunicorn) the drained worker is just
+    respawned while the other workers keep their clients.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> bool:
+        if self.draining:
+            return False
+        self.draining = True
+        logger.warning("node drain started, %d connections", self.connections)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    @property
+    def connections(self) -> int:
+        return len(sio.eio.sockets)
+
+    def status(self) -> dict:
+        return {"draining": self.draining, "connections": self.connections}
+
+    async def _migrate(self, eio_sid, delay: float) -> None:
+        await asyncio.sleep(delay)
+        for namespace in list(sio.manager.get_namespaces()):
+            sid = sio.manager.sid_from_eio_sid(eio_sid, namespace)
+            if sid is not None:
+                await sio.emit("server_draining", {"reason": "node_draining"},
+                               to=sid, namespace=namespace)
+
+        # let whatever is already queued for this client go out first
+        queue = sio.outbound_queues.get(eio_sid)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.DRAIN_FLUSH_TIMEOUT_SECONDS
+        while queue is not None and len(queue) and loop.time() < deadline:
+            await asyncio.sleep(settings.SOCKETIO_QUEUE_POLL_SECONDS)
+
+        # closing the transport (not a socket.io disconnect) makes the
+        # client reconnect on its own, to another node since we refuse it
+        await sio.eio.disconnect(eio_sid)
+
+    async def _run(self) -> None:
+        eio_sids = list(sio.eio.sockets)
+        random.shuffle(eio_sids)
+        window = settings.DRAIN_WINDOW_SECONDS
+        step = window / len(eio_sids) if eio_sids else 0
+        tasks = [
+            asyncio.create_task(self._migrate(eio_sid, i * step))
+            for i, eio_sid in enumerate(eio_sids)
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=window + settings.DRAIN_FLUSH_TIMEOUT_SECONDS + 5)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.DRAIN_EXIT_TIMEOUT_SECONDS
+        while self.connections and loop.time() < deadline:
+            await asyncio.sleep(0.5)
+
+        logger.warning("node drained (%d connections left), exiting", self.connections)
+        # uvicorn handles SIGTERM as a graceful shutdown (lifespan included)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def install_signal_handler(self) -> None:
+        """Start a drain on ``DRAIN_SIGNAL`` (if set), besides POST /admin/drain."""
+        if not settings.DRAIN_SIGNAL:
+            return
+        signum = getattr(signal, settings.DRAIN_SIGNAL, None)
+        if not isinstance(signum, signal.Signals):
+            raise ValueError(f"Unknown DRAIN_SIGNAL {settings.DRAIN_SIGNAL!r}")
+        try:
+            asyncio.get_running_loop().add_signal_handler(signum, self.start)
+        except NotImplementedError:
+            pass  # windows
+
+    def guard(self, app):
+        """Wrap the socket.io ASGI app to refuse new handshakes while draining."""
+
+        async def guarded(scope, receive, send):
+            if (
+                self.draining
+                and scope["type"] in ("http", "websocket")
+                and "sid" not in parse_qs(scope.get("query_string", b"").decode())
+            ):
+                if scope["type"] == "websocket":
+                    await send({"type": "websocket.close", "code": 1013})  # try again later
+                    return
+                await send({
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"retry-after", str(settings.DRAIN_WINDOW_SECONDS).encode()),
+                        (b"content-type", b"text/plain"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": b"node draining"})
+                return
+            await app(scope, receive, send)
+
+        return guarded
+
+
+drain = NodeDrain()
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DROP_EPHEMERAL = "drop_ephemeral"
+MERGE_STATE = "merge_state"
+DISCONNECT = "disconnect"
+POLICIES = (DROP_EPHEMERAL, MERGE_STATE, DISCONNECT)
+
+
+def _csv(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+EPHEMERAL_EVENTS = frozenset(_csv(settings.SOCKETIO_EPHEMERAL_EVENTS))
+STATE_EVENTS = frozenset(_csv(settings.SOCKETIO_STATE_EVENTS))
+SLOW_CONSUMER_POLICIES = _csv(settings.SOCKETIO_SLOW_CONSUMER_POLICY)
+
+_unknown = set(SLOW_CONSUMER_POLICIES) - set(POLICIES)
+if _unknown:
+    raise ValueError(
+        f"Unknown SOCKETIO_SLOW_CONSUMER_POLICY {sorted(_unknown)}, expected some of {POLICIES}"
+    )
+
+
+@dataclass
+class OutboundItem:
+    packets: list  # engine.io packets making up one socket.io event
+    size: int
+    event: str | None = None
+    merge_key: tuple | None = None
+
+
+@dataclass
+class OutboundMetrics:
+    dropped: int = 0
+    merged: int = 0
+    disconnected: int = 0
+    max_depth: int = 0
+
+    def snapshot(self, queues) -> dict:
+        queues = list(queues)
+        depths = [len(q) for q in queues]
+        return {
+            "queues": len(depths),
+            "queued_messages": sum(depths),
+            "queued_bytes": sum(q.size for q in queues),
+            "deepest_queue": max(depths, default=0),
+            "max_depth_seen": self.max_depth,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "disconnected": self.disconnected,
+        }
+
+
+metrics = OutboundMetrics()
+
+
+def merge_key_for(event: str, data: list) -> tuple | None:
+    # a state update replaces the queued one for the same event and subject
+    if event not in STATE_EVENTS:
+        return None
+    subject = data[0] if data else None
+    if isinstance(subject, dict):
+        subject = subject.get("id") or subject.get("user_id")
+    return (event, str(subject))
+
+
+class OutboundQueue:
+    """Bounded queue of events waiting for one client.
+
+    Events are handed to the engine.io socket only while its own (unbounded)
+    queue is below ``SOCKETIO_TRANSPORT_HIGH_WATER``, so a client that stops
+    reading piles up here, where the caps and slow consumer policies apply.
+    If the configured policies leave the queue over its caps the client is
+    disconnected (as with the ``disconnect`` policy), so the caps always hold
+    and no chat message is dropped silently.
+    """
+
+    def __init__(self, server, eio_sid):
+        self.server = server
+        self.eio_sid = eio_sid
+        self.items: OrderedDict[int, OutboundItem] = OrderedDict()
+        self.size = 0
+        self._next_id = 0
+        self._flusher: asyncio.Task | None = None
+        self.closed = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def _over_cap(self) -> bool:
+        return (
+            len(self.items) > settings.SOCKETIO_QUEUE_MAX_MESSAGES
+            or self.size > settings.SOCKETIO_QUEUE_MAX_BYTES
+        )
+
+    def _remove(self, item_id):
+        item = self.items.pop(item_id)
+        self.size -= item.size
+
+    def _drop_ephemeral(self):
+        for item_id, item in list(self.items.items()):
+            if not self._over_cap():
+                return
+            if item.event in EPHEMERAL_EVENTS:
+                self._remove(item_id)
+                metrics.dropped += 1
+
+    def _merge_state(self):
+        newest = {}
+        for item_id, item in list(self.items.items()):
+            if item.merge_key is None:
+                continue
+            if item.merge_key in newest:
+                self._remove(newest[item.merge_key])
+                metrics.merged += 1
+            newest[item.merge_key] = item_id
+
+    async def put(self, item: OutboundItem) -> None:
+        if self.closed:
+            return
+        self.items[self._next_id] = item
+        self._next_id += 1
+        self.size += item.size
+        metrics.max_depth = max(metrics.max_depth, len(self.items))
+
+        for policy in SLOW_CONSUMER_POLICIES:
+            if not self._over_cap():
+                break
+            if policy == DROP_EPHEMERAL:
+                self._drop_ephemeral()
+            elif policy == MERGE_STATE:
+                self._merge_state()
+            elif policy == DISCONNECT:
+                await self._disconnect()
+                return
+
+        if self._over_cap():
+            await self._disconnect()
+            return
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+
+    def _transport_backlog(self) -> int | None:
+        socket = self.server.eio.sockets.get(self.eio_sid)
+        if socket is None:
+            return None
+        return socket.queue.qsize()
+
+    async def _flush(self):
+        while self.items and not self.closed:
+            backlog = self._transport_backlog()
+            if backlog is None:
+                return  # client is gone
+            if backlog >= settings.SOCKETIO_TRANSPORT_HIGH_WATER:
+                await asyncio.sleep(settings.SOCKETIO_QUEUE_POLL_SECONDS)
+                continue
+            item_id, item = next(iter(self.items.items()))
+            self._remove(item_id)
+            for pkt in item.packets:
+                await self.server.eio.send_packet(self.eio_sid, pkt)
+
+    async def _disconnect(self):
+        # the client reconnects after retry_after and refetches its state
+        # instead of us buffering everything it missed
+        self.closed = True
+        metrics.disconnected += 1
+        logger.info("disconnecting slow consumer %s", self.eio_sid)
+        self.items.clear()
+        self.size = 0
+        await self.server.disconnect_slow_consumer(self.eio_sid)
+
+    def close(self):
+        self.closed = True
+        self.items.clear()
+        self.size = 0
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
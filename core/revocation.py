@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+import redis
+import redis.asyncio as aioredis
+from core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RT_KEY_PREFIX = "revoked:rt:"
+USER_KEY_PREFIX = "revoked:user:"
+CHANNEL = "revocations"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # double hashing: k positions out of one 128 bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocation:
+    """Access token revocation shared across workers through redis.
+
+    Revoked sessions (``rt_id``) are stored as ``revoked:rt:<id>`` keys and
+    password changes as a per user epoch in ``revoked:user:<id>``, both with a
+    TTL equal to the access token lifetime. Every worker keeps a Bloom filter
+    of revoked rt_ids and the (small) map of user epochs in memory, kept in
+    sync over pub/sub, so ``is_revoked`` only touches redis on a Bloom hit.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        # writes come from the (sync) auth service, run in the threadpool,
+        # reads from the event loop
+        self.redis = redis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        self.aredis = aioredis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        self.bloom = self._new_bloom()
+        self.user_epochs: dict[str, float] = {}
+        self._pending: set[str] | None = None
+        self._resync_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(
+            settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE
+        )
+
+    # ---- writes (called from the auth service) ----
+
+    def revoke_session(self, rt_id: str, ttl: int) -> None:
+        if ttl <= 0:
+            return  # access token already expired
+        self.redis.set(RT_KEY_PREFIX + rt_id, 1, ex=ttl)
+        self._apply(f"rt:{rt_id}")
+        self.redis.publish(CHANNEL, f"rt:{rt_id}")
+
+    def revoke_user(self, user_id: str) -> None:
+        # every access token of this user issued up to now is revoked
+        epoch = time.time()  # sub-second, like the access token iat
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        self.redis.set(USER_KEY_PREFIX + user_id, epoch, ex=ttl)
+        self._apply(f"user:{user_id}:{epoch}")
+        self.redis.publish(CHANNEL, f"user:{user_id}:{epoch}")
+
+    # ---- reads (hot path, no network unless the Bloom filter says maybe) ----
+
+    async def is_revoked(self, payload: dict) -> bool:
+        epoch = self.user_epochs.get(str(payload.get("sub")))
+        if epoch is not None and payload.get("iat", 0) <= epoch:
+            return True
+
+        rt_id = payload.get("rt_id")
+        if not rt_id or rt_id not in self.bloom:
+            return False
+        try:
+            # could be a false positive, redis has the real answer
+            return bool(await self.aredis.exists(RT_KEY_PREFIX + rt_id))
+        except redis.RedisError:
+            logger.warning("revocation check failed for %s, rejecting token", rt_id)
+            return True
+
+    # ---- local state ----
+
+    def _apply(self, message: str) -> None:
+        kind, _, rest = message.partition(":")
+        if kind == "rt":
+            self.bloom.add(rest)
+        elif kind == "user":
+            user_id, _, epoch = rest.rpartition(":")
+            self.user_epochs[user_id] = max(float(epoch), self.user_epochs.get(user_id, 0))
+        if self._pending is not None:
+            self._pending.add(message)
+
+    async def resync(self, client: aioredis.Redis) -> None:
+        """Rebuild the local state from redis (drops expired revocations)."""
+        async with self._resync_lock:
+            self._pending = set()
+            try:
+                bloom = self._new_bloom()
+                async for key in client.scan_iter(match=RT_KEY_PREFIX + "*", count=1000):
+                    bloom.add(key[len(RT_KEY_PREFIX):])
+
+                user_epochs = {}
+                async for key in client.scan_iter(match=USER_KEY_PREFIX + "*", count=1000):
+                    epoch = await client.get(key)
+                    if epoch is not None:
+                        user_epochs[key[len(USER_KEY_PREFIX):]] = float(epoch)
+            except BaseException:
+                self._pending = None
+                raise
+
+            pending, self._pending = self._pending, None
+            self.bloom, self.user_epochs = bloom, user_epochs
+            # revocations that arrived while we were scanning
+            for message in pending:
+                self._apply(message)
+
+    async def _listen(self) -> None:
+        while True:
+            client = aioredis.Redis.from_url(self.url, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                # subscribe first, then resync, so nothing falls in between
+                await self.resync(client)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._apply(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("revocation listener lost redis, retrying")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    async def _resync_loop(self) -> None:
+        client = aioredis.Redis.from_url(self.url, decode_responses=True)
+        try:
+            while True:
+                await asyncio.sleep(settings.REVOCATION_RESYNC_SECONDS)
+                try:
+                    await self.resync(client)
+                except redis.RedisError:
+                    logger.warning("revocation resync failed, keeping current state")
+        finally:
+            await client.aclose()
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._resync_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.aredis.aclose()
+
+
+revocation = TokenRevocation(settings.REDIS_URL)
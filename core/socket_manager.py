@@ -1,13 +1,238 @@
+import asyncio
+import msgpack
 import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+from core.config import get_settings
+from core.wire import (
+    JsonCodec,
+    CompactPacket,
+    pack_compact,
+    unpack_compact,
+    to_compact,
+    wants_compact_wire,
+)
+from core.outbound import OutboundItem, OutboundQueue, merge_key_for
+
+settings = get_settings()
+
+
+def user_room(user_id) -> str:
+    # every socket of a user (all devices, all nodes) joins this room
+    return f"user:{user_id}"
+
+
+class _WireFanoutManager(socketio.AsyncManager):
+    # Local fan-out for an emit. Sits under the pub/sub layer in the MRO so
+    # both local emits and the ones received from redis go through here.
+    # The packet is encoded once per wire format instead of once per client
+    # and goes through the client's outbound queue (see core.outbound).
+
+    async def emit(self, event, data, namespace, room=None, skip_sid=None,
+                   callback=None, to=None, **kwargs):
+        if callback:
+            # acks need a unique packet per client, _send_packet picks the format
+            return await super().emit(
+                event, data, namespace, room=room, skip_sid=skip_sid,
+                callback=callback, to=to, **kwargs)
+
+        room = to or room
+        if namespace not in self.rooms:
+            return
+        if isinstance(data, tuple):
+            data = list(data)
+        elif data is not None:
+            data = [data]
+        else:
+            data = []
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+
+        encoded = {}
+        merge_key = merge_key_for(event, data)
+
+        def outbound_item(compact):
+            if compact not in encoded:
+                packet_class = CompactPacket if compact else self.server.packet_class
+                ep = packet_class(
+                    packet.EVENT, namespace=namespace, data=[event] + data
+                ).encode()
+                if not isinstance(ep, list):
+                    ep = [ep]
+                encoded[compact] = OutboundItem(
+                    packets=[eio_packet.Packet(eio_packet.MESSAGE, p) for p in ep],
+                    size=sum(len(p) for p in ep),
+                    event=event,
+                    merge_key=merge_key,
+                )
+            return encoded[compact]
+
+        tasks = []
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid in skip_sid:
+                continue
+            compact = eio_sid in self.server.compact_eio_sids
+            tasks.append(asyncio.create_task(
+                self.server._queue_event(eio_sid, outbound_item(compact))))
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+class ChatRedisManager(socketio.AsyncRedisManager, _WireFanoutManager):
+    # Pub/sub messages are packed with msgpack (same ext types as the compact
+    # wire) instead of engineio's json, so emits carrying UUIDs / datetimes
+    # reach other nodes intact.
+
+    async def _publish(self, data):
+        _, error = self._get_redis_module_and_error()
+        for retries_left in range(1, -1, -1):  # 2 attempts
+            try:
+                if not self.connected:
+                    self._redis_connect()
+                return await self.redis.publish(self.channel, pack_compact(data))
+            except error as exc:
+                self.connected = False
+                if retries_left == 0:
+                    self._get_logger().error(
+                        "Cannot publish to redis... giving up",
+                        extra={"redis_exception": str(exc)},
+                    )
+
+    async def _listen(self):
+        async for data in super()._listen():
+            try:
+                yield unpack_compact(data)
+            except (ValueError, msgpack.ExtraData):
+                yield data  # json from a node still on the old format
+
+    async def disconnect_room(self, room, namespace=None, reason=None):
+        """Disconnect every client in a room, on every node.
+
+        With ``reason``, each client first gets a ``force_disconnect`` event
+        carrying it.
+        """
+        message = {"method": "disconnect", "room": room, "reason": reason,
+                   "namespace": namespace or "/", "host_id": self.host_id}
+        await self._handle_disconnect(message)  # handle in this host
+        await self._publish(message)  # notify other hosts
+
+    async def _handle_disconnect(self, message):
+        if message.get("room") is None:
+            return await super()._handle_disconnect(message)
+        namespace = message.get("namespace")
+        reason = message.get("reason")
+        for sid, eio_sid in list(self.get_participants(namespace, message["room"])):
+            if reason:
+                # straight to the transport like the DISCONNECT packet, a
+                # backed up outbound queue would deliver it after the close
+                await self.server._send_packet(eio_sid, self.server.packet_class(
+                    packet.EVENT, namespace=namespace,
+                    data=["force_disconnect", {"reason": reason}]))
+            await self.server.disconnect(sid, namespace=namespace, ignore_queue=True)
+
+
+class ChatAsyncServer(socketio.AsyncServer):
+    """AsyncServer that lets each client pick its wire format at handshake.
+
+    Clients connecting with ``?wire=msgpack`` get msgpack packets (see
+    ``core.wire.CompactPacket``), everyone else keeps the default json ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compact_eio_sids = set()
+        self.outbound_queues = {}  # eio_sid -> OutboundQueue
+
+    async def emit_to_users(self, event, data=None, user_ids=(), skip_sid=None,
+                            namespace=None):
+        """Emit to every device of the given users in one manager call.
+
+        The rooms are passed as a list so the event is published once and each
+        node only walks the sockets of these users.
+        """
+        rooms = [user_room(user_id) for user_id in set(user_ids)]
+        if not rooms:
+            return
+        await self.emit(event, data, to=rooms, skip_sid=skip_sid, namespace=namespace)
+
+    async def disconnect_user(self, user_id, reason=None, namespace=None):
+        """Disconnect all of a user's devices across nodes."""
+        await self.manager.disconnect_room(
+            user_room(user_id), namespace=namespace, reason=reason
+        )
+
+    async def _queue_event(self, eio_sid, item):
+        queue = self.outbound_queues.get(eio_sid)
+        if queue is None:
+            return  # client already gone
+        await queue.put(item)
+
+    async def disconnect_slow_consumer(self, eio_sid):
+        """Tell the client why and when to come back, then drop it."""
+        hint = {
+            "reason": "slow_consumer",
+            "retry_after": settings.SOCKETIO_RESUME_RETRY_SECONDS,
+        }
+        for namespace in list(self.manager.get_namespaces()):
+            sid = self.manager.sid_from_eio_sid(eio_sid, namespace)
+            if sid is None:
+                continue
+            # bypasses the full queue on purpose
+            await self._send_packet(eio_sid, self.packet_class(
+                packet.EVENT, namespace=namespace, data=["resume_hint", hint]))
+            await self.disconnect(sid, namespace=namespace, ignore_queue=True)
+
+    async def _send_packet(self, eio_sid, pkt):
+        if eio_sid in self.compact_eio_sids:
+            pkt = to_compact(pkt)
+        await super()._send_packet(eio_sid, pkt)
+
+    async def _handle_eio_connect(self, eio_sid, environ):
+        if settings.SOCKETIO_COMPACT_WIRE and wants_compact_wire(environ):
+            self.compact_eio_sids.add(eio_sid)
+        self.outbound_queues[eio_sid] = OutboundQueue(self, eio_sid)
+        return await super()._handle_eio_connect(eio_sid, environ)
+
+    async def _handle_eio_message(self, eio_sid, data):
+        if eio_sid not in self.compact_eio_sids:
+            return await super()._handle_eio_message(eio_sid, data)
+
+        pkt = CompactPacket(encoded_packet=data)
+        if pkt.packet_type == packet.CONNECT:
+            await self._handle_connect(eio_sid, pkt.namespace, pkt.data)
+        elif pkt.packet_type == packet.DISCONNECT:
+            await self._handle_disconnect(
+                eio_sid, pkt.namespace, self.reason.CLIENT_DISCONNECT
+            )
+        elif pkt.packet_type == packet.EVENT:
+            await self._handle_event(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        elif pkt.packet_type == packet.ACK:
+            await self._handle_ack(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        else:
+            raise ValueError("Unexpected packet type for msgpack client.")
+
+    async def _handle_eio_disconnect(self, eio_sid, reason):
+        try:
+            await super()._handle_eio_disconnect(eio_sid, reason)
+        finally:
+            self.compact_eio_sids.discard(eio_sid)
+            queue = self.outbound_queues.pop(eio_sid, None)
+            if queue is not None:
+                queue.close()
 
 
-mgr = socketio.AsyncRedisManager("redis://localhost:6379/0")
+mgr = ChatRedisManager(settings.REDIS_URL)
 # create the async socketio server
 
-sio = socketio.AsyncServer(
+sio = ChatAsyncServer(
     async_mode="asgi",
     client_manager=mgr,
+    json=JsonCodec,  # lets json clients receive UUIDs / datetimes as strings
     cors_allowed_origins="*",  # allow the frontend to connect from any port
+    # compress polling responses above the threshold (websocket
+    # permessage-deflate is negotiated by uvicorn, --ws-per-message-deflate)
+    http_compression=settings.SOCKETIO_HTTP_COMPRESSION,
+    compression_threshold=settings.SOCKETIO_COMPRESSION_THRESHOLD,
     logger=True,  #  Enable logs
     engineio_logger=True,  #  Enable low-level logs
 )
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+from starlette.concurrency import run_in_threadpool
+from core.config import get_settings
+
+settings = get_settings()
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+class LocalDiskStorage:
+    """Content addressed blob store on the local disk.
+
+    Blobs live at ``<root>/<aa>/<bb>/<sha256>``, so the same bytes uploaded
+    (or forwarded) any number of times are stored once.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        return self.path(sha256).is_file()
+
+    def delete(self, sha256: str) -> None:
+        self.path(sha256).unlink(missing_ok=True)
+
+    def mtime(self, sha256: str) -> float | None:
+        try:
+            return self.path(sha256).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def iter_blobs(self) -> Iterator[str]:
+        for path in self.root.glob("??/??/*"):
+            if path.is_file():
+                yield path.name
+
+    async def save_stream(
+        self, chunks: AsyncIterator[bytes], max_bytes: int
+    ) -> tuple[str, int]:
+        """Write a stream to disk while hashing it, return (sha256, size).
+
+        Only one chunk is held in memory at a time, whatever the file size.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise FileTooLarge()
+                    digest.update(chunk)
+                    await run_in_threadpool(tmp.write, chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self.path(sha256)
+            if final_path.exists():
+                os.unlink(tmp_path)  # already stored, keep the existing copy
+                # fresh mtime: the GC sweep leaves it alone while we insert
+                os.utime(final_path)
+            else:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)  # atomic, concurrent uploads are fine
+            return sha256, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+storage = LocalDiskStorage(settings.ATTACHMENT_STORAGE_DIR)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from core.database import Base
+import uuid
+
+
+class FileBlob(Base):
+    """Stored bytes, keyed by their SHA-256 (one row per distinct file)."""
+
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Attachment(Base):
+    """A file as posted in a conversation. Forwards share the same blob."""
+
+    __tablename__ = "attachments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sha256 = Column(String(64), ForeignKey("file_blobs.sha256"), nullable=False, index=True)
+    conversation_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    uploader_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    blob = relationship("FileBlob")
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from core.database import Base
+
+
+class ConversationSummary(Base):
+    """One row per (user, conversation): what the conversation list shows.
+
+    Denormalized from conversations / messages / conversation_members and
+    kept up to date on every send and read (see ChatService).
+    """
+
+    __tablename__ = "conversation_summaries"
+
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    conversation_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    title = Column(String(100), nullable=True)
+    last_message_id = Column(UUID(as_uuid=True), nullable=True)
+    last_message_sender_id = Column(UUID(as_uuid=True), nullable=True)
+    last_message_preview = Column(String(120), nullable=True)
+    last_activity_at = Column(DateTime(timezone=True), nullable=False)
+    unread_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # the conversation list query: my rows by recent activity (keyset)
+        Index(
+            "ix_conversation_summaries_user_activity",
+            "user_id",
+            "last_activity_at",
+            "conversation_id",
+        ),
+    )
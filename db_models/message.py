@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from core.database import Base
+import uuid
+
+
+class Message(Base):
+    __tablename__ = "messages"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    conversation_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    sender_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    content = Column(Text, nullable=False)
+
+    # set by the service (not the db) so the summaries get the exact same value
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # history pages and "last message" lookups
+        Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
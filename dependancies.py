@@ -4,9 +4,10 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import jwt
 from jwt.exceptions import PyJWTError
-from core.database import get_db
+from core.database import get_db, use_replica
 from db_models.user import User
 from core.security import decode_token
+from core.revocation import revocation
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -35,7 +36,18 @@ async def get_current_user(
     if token_type != "access":
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    if await revocation.is_revoked(payload):
+        raise credentials_exception
+
+    # tag the session so commits made during this request keep this user's
+    # reads on the primary for a while (read-your-writes)
+    db.info["user_id"] = user_id
+    with use_replica(db):
+        user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        # maybe just registered and the replica has not caught up yet
+        # (another worker did the write, so recently_wrote can't tell)
+        user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
 
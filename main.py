@@ -1,20 +1,36 @@
-from fastapi import FastAPI
-from routers import auth, profile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
+from routers import auth, profile, chat, admin
 from core.database import engine, Base
 from core.config import get_settings
 from core.socket_manager import sio, sio_app 
+from core.revocation import revocation
+from core.drain import drain
 from sockets import events  # Register events
 
 settings = get_settings()
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title=settings.APP_NAME)
 
-# Mount at /socket.io
-app.mount("/socket.io", sio_app)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # keep this worker's revocation filter in sync with redis
+    await revocation.start()
+    # optional DRAIN_SIGNAL starts a graceful drain (same as POST /admin/drain)
+    drain.install_signal_handler()
+    yield
+    await revocation.stop()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+# Mount at /socket.io (new handshakes are refused while the node drains)
+app.mount("/socket.io", drain.guard(sio_app))
 
 app.include_router(auth.router)
 app.include_router(profile.router)
+app.include_router(chat.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -22,3 +38,11 @@ async def root():
     return {"message": "Hello FastAPI"}
 
 
+@app.get("/health")
+async def health(response: Response):
+    # load balancers stop routing here as soon as a drain starts
+    if drain.draining:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return drain.status()
+
+
@@ -0,0 +1,65 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Annotated, Optional
+from uuid import UUID
+from core.database import get_db
+from core.config import get_settings
+from core.outbound import metrics
+from core.drain import drain
+from core.socket_manager import sio
+from services.attachment_service import AttachmentService
+from services.chat_service import ChatService
+
+settings = get_settings()
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def require_admin(x_admin_token: Annotated[Optional[str], Header()] = None):
+    # admin endpoints are off unless ADMIN_TOKEN is configured
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not x_admin_token or not secrets.compare_digest(
+        x_admin_token, settings.ADMIN_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token"
+        )
+
+
+@router.get("/sockets/queues", dependencies=[Depends(require_admin)])
+async def outbound_queue_metrics():
+    return metrics.snapshot(sio.outbound_queues.values())
+
+
+@router.get("/drain", dependencies=[Depends(require_admin)])
+async def drain_status():
+    return drain.status()
+
+
+@router.post(
+    "/drain",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin)],
+)
+async def start_drain():
+    """Start draining this worker (stops handshakes, migrates clients, exits).
+
+    Only drains the node when it runs one worker, see core.drain.NodeDrain.
+    """
+    drain.start()
+    return drain.status()
+
+
+@router.post("/conversations/rebuild-summaries", dependencies=[Depends(require_admin)])
+def rebuild_conversation_summaries(
+    user_id: Optional[UUID] = None, db: Session = Depends(get_db)
+):
+    """Rebuild the conversation list rows from the source tables"""
+    return ChatService.rebuild_summaries(db=db, user_id=user_id)
+
+
+@router.post("/attachments/collect-garbage", dependencies=[Depends(require_admin)])
+def collect_attachment_garbage(db: Session = Depends(get_db)):
+    """Delete stored files no attachment references (e.g. failed uploads)"""
+    return AttachmentService.collect_garbage(db=db)
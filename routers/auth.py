@@ -9,8 +9,10 @@ from core.database import get_db
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from dependancies import get_current_user, oauth2_scheme
 from services.auth_service import AuthService
+from core.socket_manager import sio
 
 limiter = Limiter(key_func=get_remote_address)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -56,7 +58,8 @@ async def logout_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    AuthService.logout_user(db=db, access_token=token)
+    # revocation makes blocking redis calls, keep them off the event loop
+    await run_in_threadpool(AuthService.logout_user, db=db, access_token=token)
     return None
 
 
@@ -68,9 +71,14 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return AuthService.change_user_password(
+    # revocation makes blocking redis calls, keep them off the event loop
+    result = await run_in_threadpool(
+        AuthService.change_user_password,
         db=db,
         user=current_user,
         old_password=passwords.old_password,
         new_password=passwords.new_password,
     )
+    # kick every connected device, their tokens are revoked now
+    await sio.disconnect_user(current_user.id, reason="password_changed")
+    return result
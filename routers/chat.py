@@ -0,0 +1,202 @@
+from fastapi import APIRouter, Depends, Query, Request, status, HTTPException
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Annotated, Optional
+from uuid import UUID
+from dependancies import get_current_user
+from db_models.user import User
+from core.database import get_db
+from core.config import get_settings
+from core.socket_manager import sio
+from schemas.chat import (
+    AttachmentForward,
+    AttachmentOut,
+    ConversationCreate,
+    ConversationOut,
+    ConversationPage,
+    MessageCreate,
+    MessageOut,
+    MessagePage,
+)
+from services.chat_service import ChatService
+from services.attachment_service import AttachmentService
+
+settings = get_settings()
+router = APIRouter(prefix="/chat", tags=["Chat"])
+
+
+@router.post(
+    "/conversations", response_model=ConversationOut, status_code=status.HTTP_201_CREATED
+)
+def create_conversation(
+    data: ConversationCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    return ChatService.create_conversation(db=db, user=current_user, data=data)
+
+
+@router.get("/conversations", response_model=ConversationPage)
+def list_conversations(
+    current_user: Annotated[User, Depends(get_current_user)],
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    db: Session = Depends(get_db),
+):
+    """My conversations, most recent activity first (keyset paginated)"""
+    return ChatService.list_conversations(
+        db=db, user=current_user, cursor=cursor, limit=limit
+    )
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePage)
+def get_messages(
+    conversation_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+    db: Session = Depends(get_db),
+):
+    return ChatService.get_messages(
+        db=db,
+        user=current_user,
+        conversation_id=conversation_id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+@router.post(
+    "/conversations/{conversation_id}/messages",
+    response_model=MessageOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def send_message(
+    conversation_id: UUID,
+    data: MessageCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    # the service is sync, keep its queries off the loop serving the sockets
+    message = await run_in_threadpool(
+        ChatService.send_message,
+        db=db,
+        user=current_user,
+        conversation_id=conversation_id,
+        content=data.content,
+    )
+    member_ids = await run_in_threadpool(
+        ChatService.get_member_ids, db=db, conversation_id=conversation_id
+    )
+    await sio.emit_to_users(
+        "new_message",
+        MessageOut.model_validate(message).model_dump(mode="json"),
+        user_ids=member_ids,
+    )
+    return message
+
+
+@router.post(
+    "/conversations/{conversation_id}/read", status_code=status.HTTP_204_NO_CONTENT
+)
+async def mark_read(
+    conversation_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    await run_in_threadpool(
+        ChatService.mark_read, db=db, user=current_user, conversation_id=conversation_id
+    )
+    # clear the badge on the user's other devices
+    await sio.emit_to_users(
+        "conversation_read", {"conversation_id": str(conversation_id)}, user_ids=[current_user.id]
+    )
+
+
+@router.post(
+    "/conversations/{conversation_id}/attachments",
+    response_model=AttachmentOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_attachment(
+    conversation_id: UUID,
+    request: Request,
+    filename: Annotated[str, Query(min_length=1, max_length=255)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    """Upload a file as the raw request body (not multipart), streamed to disk"""
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Content-Length"
+            )
+        if content_length > settings.ATTACHMENT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large",
+            )
+
+    content_type = request.headers.get("content-type", "application/octet-stream")
+    if len(content_type) > 100:  # Attachment.content_type column size
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Content-Type"
+        )
+
+    attachment = await AttachmentService.upload(
+        db=db,
+        user=current_user,
+        conversation_id=conversation_id,
+        filename=filename,
+        content_type=content_type,
+        chunks=request.stream(),
+    )
+    # to_out loads the blob row
+    return await run_in_threadpool(AttachmentService.to_out, attachment)
+
+
+@router.get("/attachments/{attachment_id}")
+def download_attachment(
+    attachment_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    attachment = AttachmentService.get_attachment(
+        db=db, user=current_user, attachment_id=attachment_id
+    )
+    # FileResponse answers Range requests and streams from disk in chunks
+    # (or hands the path to the server when it supports pathsend)
+    return FileResponse(
+        AttachmentService.get_file_path(attachment),
+        media_type=attachment.content_type,
+        filename=attachment.filename,
+        headers={
+            # content addressed, the bytes behind this id never change
+            "etag": f'"{attachment.sha256}"',
+            "cache-control": "private, max-age=31536000, immutable",
+        },
+    )
+
+
+@router.post(
+    "/attachments/{attachment_id}/forward",
+    response_model=AttachmentOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def forward_attachment(
+    attachment_id: UUID,
+    data: AttachmentForward,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    attachment = AttachmentService.forward(
+        db=db,
+        user=current_user,
+        attachment_id=attachment_id,
+        conversation_id=data.conversation_id,
+    )
+    return AttachmentService.to_out(attachment)
@@ -0,0 +1,72 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class ConversationCreate(BaseModel):
+    member_ids: list[UUID] = Field(..., min_length=1, max_length=100)
+    title: Optional[str] = Field(None, max_length=100)
+
+
+class ConversationOut(BaseModel):
+    id: UUID
+    title: Optional[str]
+    created_by: UUID
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationSummaryOut(BaseModel):
+    conversation_id: UUID
+    title: Optional[str]
+    last_message_id: Optional[UUID]
+    last_message_sender_id: Optional[UUID]
+    last_message_preview: Optional[str]
+    last_activity_at: datetime
+    unread_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationPage(BaseModel):
+    items: list[ConversationSummaryOut]
+    next_cursor: Optional[str]  # pass back as ?cursor= for the next page
+
+
+class MessageCreate(BaseModel):
+    content: str = Field(..., min_length=1, max_length=4000)
+
+
+class MessageOut(BaseModel):
+    id: UUID
+    conversation_id: UUID
+    sender_id: UUID
+    content: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class MessagePage(BaseModel):
+    items: list[MessageOut]
+    next_cursor: Optional[str]
+
+
+class AttachmentOut(BaseModel):
+    id: UUID
+    conversation_id: UUID
+    uploader_id: UUID
+    filename: str
+    content_type: str
+    sha256: str
+    size: int
+    created_at: datetime
+
+
+class AttachmentForward(BaseModel):
+    conversation_id: UUID
@@ -0,0 +1,195 @@
+import time
+from typing import AsyncIterator
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from core.config import get_settings
+from core.storage import storage, FileTooLarge
+from db_models.attachment import Attachment, FileBlob
+from db_models.user import User
+from services.chat_service import ChatService
+
+settings = get_settings()
+
+
+class AttachmentService:
+
+    @staticmethod
+    def to_out(attachment: Attachment) -> dict:
+        return {
+            "id": attachment.id,
+            "conversation_id": attachment.conversation_id,
+            "uploader_id": attachment.uploader_id,
+            "filename": attachment.filename,
+            "content_type": attachment.content_type,
+            "sha256": attachment.sha256,
+            "size": attachment.blob.size,
+            "created_at": attachment.created_at,
+        }
+
+    @staticmethod
+    def _ensure_blob(db: Session, sha256: str, size: int) -> None:
+        if db.get(FileBlob, sha256) is not None:
+            return
+        try:
+            db.add(FileBlob(sha256=sha256, size=size))
+            db.commit()
+        except IntegrityError:
+            # same file uploaded concurrently, the other request won
+            db.rollback()
+
+    @staticmethod
+    def _check_membership(db: Session, user: User, conversation_id: UUID) -> None:
+        ChatService.get_membership(db, user, conversation_id)
+        # don't keep a pooled connection checked out while the file streams in
+        db.commit()
+
+    @staticmethod
+    def _create(
+        db: Session,
+        user: User,
+        conversation_id: UUID,
+        filename: str,
+        content_type: str,
+        sha256: str,
+        size: int,
+    ) -> Attachment:
+        try:
+            AttachmentService._ensure_blob(db, sha256, size)
+            attachment = Attachment(
+                sha256=sha256,
+                conversation_id=conversation_id,
+                uploader_id=user.id,
+                filename=filename,
+                content_type=content_type,
+            )
+            db.add(attachment)
+            db.commit()
+            db.refresh(attachment)
+            return attachment
+        except Exception:
+            # the file stays on disk, collect_garbage removes it if unused
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not save attachment",
+            )
+
+    @staticmethod
+    async def upload(
+        db: Session,
+        user: User,
+        conversation_id: UUID,
+        filename: str,
+        content_type: str,
+        chunks: AsyncIterator[bytes],
+    ) -> Attachment:
+        # the DB steps are sync, run them off the event loop like the file writes
+        await run_in_threadpool(
+            AttachmentService._check_membership, db, user, conversation_id
+        )
+
+        try:
+            sha256, size = await storage.save_stream(
+                chunks, max_bytes=settings.ATTACHMENT_MAX_BYTES
+            )
+        except FileTooLarge:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large",
+            )
+
+        return await run_in_threadpool(
+            AttachmentService._create,
+            db,
+            user,
+            conversation_id,
+            filename,
+            content_type,
+            sha256,
+            size,
+        )
+
+    @staticmethod
+    def get_attachment(db: Session, user: User, attachment_id: UUID) -> Attachment:
+        attachment = db.get(Attachment, attachment_id)
+        if not attachment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found"
+            )
+        # only members of the conversation can see its files
+        ChatService.get_membership(db, user, attachment.conversation_id)
+        return attachment
+
+    @staticmethod
+    def get_file_path(attachment: Attachment):
+        path = storage.path(attachment.sha256)
+        if not path.is_file():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+            )
+        return path
+
+    @staticmethod
+    def forward(
+        db: Session, user: User, attachment_id: UUID, conversation_id: UUID
+    ) -> Attachment:
+        source = AttachmentService.get_attachment(db, user, attachment_id)
+        ChatService.get_membership(db, user, conversation_id)
+
+        # new row, same blob: a forward never copies bytes
+        attachment = Attachment(
+            sha256=source.sha256,
+            conversation_id=conversation_id,
+            uploader_id=user.id,
+            filename=source.filename,
+            content_type=source.content_type,
+        )
+        try:
+            db.add(attachment)
+            db.commit()
+            db.refresh(attachment)
+            return attachment
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not forward attachment",
+            )
+
+    @staticmethod
+    def collect_garbage(db: Session) -> dict:
+        """Delete blobs (row and file) that no attachment points to.
+
+        Failed uploads leave their file behind, removing it in the request
+        could pull it from under a concurrent upload of the same bytes.
+        Files touched within ``ATTACHMENT_GC_GRACE_SECONDS`` are skipped:
+        ``save_stream`` refreshes the mtime of a file it reuses.
+        """
+        cutoff = time.time() - settings.ATTACHMENT_GC_GRACE_SECONDS
+        removed = 0
+        for sha256 in storage.iter_blobs():
+            mtime = storage.mtime(sha256)
+            if mtime is None or mtime > cutoff:
+                continue
+            referenced = db.query(
+                db.query(Attachment).filter(Attachment.sha256 == sha256).exists()
+            ).scalar()
+            if referenced:
+                continue
+            try:
+                db.query(FileBlob).filter(FileBlob.sha256 == sha256).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+            except IntegrityError:
+                # an attachment was inserted since the check
+                db.rollback()
+                continue
+            mtime = storage.mtime(sha256)
+            if mtime is not None and mtime <= cutoff:
+                storage.delete(sha256)
+                removed += 1
+        return {"removed": removed}
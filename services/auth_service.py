@@ -13,6 +13,8 @@ from core.security import (
     decode_token,
 )
 from core.config import get_settings
+from core.revocation import revocation
+import redis
 
 settings = get_settings()
 
@@ -45,6 +47,9 @@ class AuthService:
 
         try:
             db.add(new_user)
+            db.flush()
+            # read-your-writes: keep the new user's next reads on the primary
+            db.info["user_id"] = str(new_user.id)
             db.commit()
             db.refresh(new_user)
 
@@ -85,6 +90,7 @@ class AuthService:
             token=refresh_token, expires_at=expires_at, user_id=user.id
         )
 
+        db.info["user_id"] = str(user.id)  # read-your-writes, see core.database
         try:
             db.add(db_token)
             db.commit()
@@ -122,6 +128,7 @@ class AuthService:
             )
 
         user_id = payload.get("sub")
+        db.info["user_id"] = user_id  # read-your-writes, see core.database
 
         # Find stored refresh token
         stored_token = (
@@ -196,6 +203,18 @@ class AuthService:
 
         # Find and Delete that SPECIFIC Session
         if refresh_token_id:
+            # the access token itself stays valid until exp, so denylist it.
+            # Done first: if redis is down nothing is committed and the
+            # client can just retry the logout
+            ttl = int(payload["exp"] - datetime.now(timezone.utc).timestamp())
+            try:
+                revocation.revoke_session(refresh_token_id, ttl=ttl)
+            except redis.RedisError:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Logout failed",
+                )
+
             stored_token = (
                 db.query(RefreshToken).filter(RefreshToken.id == refresh_token_id)
             ).first()
@@ -212,6 +231,8 @@ class AuthService:
     def change_user_password(
         db: Session, user: User, old_password: str, new_password: str
     ) -> dict:
+        # current_user may come from a lagging replica, check the primary's hash
+        db.refresh(user)
         # Verify old password
         if not verify_password(old_password, user.hashed_password):
             raise HTTPException(status_code=400, detail="Incorrect password")
@@ -225,4 +246,13 @@ class AuthService:
         db.query(RefreshToken).filter(RefreshToken.user_id == user.id).delete()
         db.commit()
 
+        # and invalidate the access tokens that are already out there
+        try:
+            revocation.revoke_user(str(user.id))
+        except redis.RedisError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Password updated but active sessions could not be revoked",
+            )
+
         return {"message": "Password updated"}
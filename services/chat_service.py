@@ -0,0 +1,371 @@
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, or_, tuple_
+from sqlalchemy.orm import Session
+from core.database import use_replica
+from db_models.user import User
+from db_models.conversation import Conversation, ConversationMember
+from db_models.conversation_summary import ConversationSummary
+from db_models.message import Message
+from schemas.chat import ConversationCreate
+
+PREVIEW_LENGTH = 100
+
+
+def encode_cursor(at: datetime, id) -> str:
+    raw = f"{at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        at, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(at), UUID(id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+class ChatService:
+
+    @staticmethod
+    def get_membership(db: Session, user: User, conversation_id: UUID) -> ConversationMember:
+        member = (
+            db.query(ConversationMember)
+            .filter(
+                ConversationMember.conversation_id == conversation_id,
+                ConversationMember.user_id == user.id,
+            )
+            .first()
+        )
+        if not member:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+            )
+        return member
+
+    @staticmethod
+    def get_member_ids(db: Session, conversation_id: UUID) -> list[UUID]:
+        rows = db.query(ConversationMember.user_id).filter(
+            ConversationMember.conversation_id == conversation_id
+        )
+        return [row.user_id for row in rows]
+
+    @staticmethod
+    def create_conversation(
+        db: Session, user: User, data: ConversationCreate
+    ) -> Conversation:
+        member_ids = set(data.member_ids) | {user.id}
+
+        found = db.query(func.count(User.id)).filter(User.id.in_(member_ids)).scalar()
+        if found != len(member_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown member"
+            )
+
+        now = datetime.now(timezone.utc)
+        conversation = Conversation(title=data.title, created_by=user.id, created_at=now)
+        try:
+            db.add(conversation)
+            db.flush()
+            for member_id in member_ids:
+                db.add(
+                    ConversationMember(
+                        conversation_id=conversation.id, user_id=member_id, joined_at=now
+                    )
+                )
+                db.add(
+                    ConversationSummary(
+                        user_id=member_id,
+                        conversation_id=conversation.id,
+                        title=data.title,
+                        last_activity_at=now,
+                        unread_count=0,
+                    )
+                )
+            db.commit()
+            db.refresh(conversation)
+            return conversation
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not create conversation",
+            )
+
+    @staticmethod
+    def send_message(
+        db: Session, user: User, conversation_id: UUID, content: str
+    ) -> Message:
+        member = ChatService.get_membership(db, user, conversation_id)
+
+        now = datetime.now(timezone.utc)
+        message = Message(
+            conversation_id=conversation_id,
+            sender_id=user.id,
+            content=content,
+            created_at=now,
+        )
+        try:
+            db.add(message)
+            db.flush()
+
+            # one UPDATE for every member's summary. The last_* columns only
+            # move forward (a slower concurrent send can commit after a newer
+            # one), the unread counter is bumped for everyone but the sender.
+            newer = ConversationSummary.last_activity_at <= now
+            preview = content[:PREVIEW_LENGTH]
+            db.query(ConversationSummary).filter(
+                ConversationSummary.conversation_id == conversation_id
+            ).update(
+                {
+                    ConversationSummary.last_message_id: case(
+                        (newer, message.id), else_=ConversationSummary.last_message_id
+                    ),
+                    ConversationSummary.last_message_sender_id: case(
+                        (newer, user.id), else_=ConversationSummary.last_message_sender_id
+                    ),
+                    ConversationSummary.last_message_preview: case(
+                        (newer, preview), else_=ConversationSummary.last_message_preview
+                    ),
+                    ConversationSummary.last_activity_at: case(
+                        (newer, now), else_=ConversationSummary.last_activity_at
+                    ),
+                    ConversationSummary.unread_count: case(
+                        (ConversationSummary.user_id == user.id, 0),
+                        else_=ConversationSummary.unread_count + 1,
+                    ),
+                },
+                synchronize_session=False,
+            )
+            # sending implies the sender has read the conversation
+            member.last_read_at = now
+            db.commit()
+            db.refresh(message)
+            return message
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not send message",
+            )
+
+    @staticmethod
+    def mark_read(db: Session, user: User, conversation_id: UUID) -> None:
+        member = ChatService.get_membership(db, user, conversation_id)
+        member.last_read_at = datetime.now(timezone.utc)
+        db.query(ConversationSummary).filter(
+            ConversationSummary.user_id == user.id,
+            ConversationSummary.conversation_id == conversation_id,
+        ).update({ConversationSummary.unread_count: 0}, synchronize_session=False)
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not mark conversation as read",
+            )
+
+    @staticmethod
+    def list_conversations(
+        db: Session, user: User, cursor: Optional[str] = None, limit: int = 20
+    ) -> dict:
+        query = db.query(ConversationSummary).filter(
+            ConversationSummary.user_id == user.id
+        )
+        if cursor:
+            at, conversation_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(
+                    ConversationSummary.last_activity_at,
+                    ConversationSummary.conversation_id,
+                )
+                < tuple_(at, conversation_id)
+            )
+
+        with use_replica(db):
+            rows = (
+                query.order_by(
+                    ConversationSummary.last_activity_at.desc(),
+                    ConversationSummary.conversation_id.desc(),
+                )
+                .limit(limit + 1)
+                .all()
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].last_activity_at, rows[-1].conversation_id)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    @staticmethod
+    def get_messages(
+        db: Session,
+        user: User,
+        conversation_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> dict:
+        with use_replica(db):
+            ChatService.get_membership(db, user, conversation_id)
+
+            query = db.query(Message).filter(Message.conversation_id == conversation_id)
+            if cursor:
+                at, message_id = decode_cursor(cursor)
+                query = query.filter(
+                    tuple_(Message.created_at, Message.id) < tuple_(at, message_id)
+                )
+            rows = (
+                query.order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _rebuild_batch(db: Session, members: list) -> None:
+        conversation_ids = {m.conversation_id for m in members}
+        user_ids = {m.user_id for m in members}
+
+        # last message of every conversation in the batch, one query
+        ranked = (
+            db.query(
+                Message.conversation_id,
+                Message.id,
+                Message.sender_id,
+                Message.content,
+                Message.created_at,
+                func.row_number()
+                .over(
+                    partition_by=Message.conversation_id,
+                    order_by=(Message.created_at.desc(), Message.id.desc()),
+                )
+                .label("rank"),
+            )
+            .filter(Message.conversation_id.in_(conversation_ids))
+            .subquery()
+        )
+        last_messages = {
+            row.conversation_id: row
+            for row in db.query(ranked).filter(ranked.c.rank == 1)
+        }
+
+        # unread counts of every member in the batch, one grouped query
+        unread_rows = (
+            db.query(
+                ConversationMember.conversation_id,
+                ConversationMember.user_id,
+                func.count(Message.id),
+            )
+            .join(Message, Message.conversation_id == ConversationMember.conversation_id)
+            .filter(
+                ConversationMember.conversation_id.in_(conversation_ids),
+                ConversationMember.user_id.in_(user_ids),
+                Message.sender_id != ConversationMember.user_id,
+                or_(
+                    ConversationMember.last_read_at.is_(None),
+                    Message.created_at > ConversationMember.last_read_at,
+                ),
+            )
+            .group_by(ConversationMember.conversation_id, ConversationMember.user_id)
+        )
+        unread = {(cid, uid): count for cid, uid, count in unread_rows}
+
+        summaries = {
+            (row.conversation_id, row.user_id): row
+            for row in db.query(ConversationSummary).filter(
+                ConversationSummary.conversation_id.in_(conversation_ids),
+                ConversationSummary.user_id.in_(user_ids),
+            )
+        }
+
+        for member in members:
+            key = (member.conversation_id, member.user_id)
+            summary = summaries.get(key)
+            if summary is None:
+                summary = ConversationSummary(
+                    user_id=member.user_id, conversation_id=member.conversation_id
+                )
+                db.add(summary)
+            last = last_messages.get(member.conversation_id)
+            summary.title = member.title
+            summary.last_message_id = last.id if last else None
+            summary.last_message_sender_id = last.sender_id if last else None
+            summary.last_message_preview = last.content[:PREVIEW_LENGTH] if last else None
+            summary.last_activity_at = last.created_at if last else member.created_at
+            summary.unread_count = unread.get(key, 0)
+
+    @staticmethod
+    def rebuild_summaries(
+        db: Session, user_id: Optional[UUID] = None, batch_size: int = 500
+    ) -> dict:
+        """Recompute summaries from conversations, members and messages.
+
+        Repair job for drift (failed updates, manual data fixes). Members are
+        processed in batches of ``batch_size`` (a few grouped queries and a
+        commit each), so a failure leaves the earlier batches rebuilt. A send
+        that races with it can leave an unread count off until the next read.
+        """
+        members = db.query(
+            ConversationMember.conversation_id,
+            ConversationMember.user_id,
+            ConversationMember.last_read_at,
+            Conversation.title,
+            Conversation.created_at,
+        ).join(Conversation, Conversation.id == ConversationMember.conversation_id)
+        if user_id is not None:
+            members = members.filter(ConversationMember.user_id == user_id)
+        members = members.order_by(
+            ConversationMember.conversation_id, ConversationMember.user_id
+        )
+
+        rebuilt = 0
+        after = None
+        try:
+            while True:
+                query = members
+                if after is not None:
+                    query = query.filter(
+                        tuple_(ConversationMember.conversation_id, ConversationMember.user_id)
+                        > tuple_(*after)
+                    )
+                batch = query.limit(batch_size).all()
+                if not batch:
+                    break
+                ChatService._rebuild_batch(db, batch)
+                db.commit()
+                db.expunge_all()  # keep the session small on big tables
+                rebuilt += len(batch)
+                after = (batch[-1].conversation_id, batch[-1].user_id)
+
+            # summaries whose membership is gone
+            orphans = db.query(ConversationSummary).filter(
+                ~db.query(ConversationMember)
+                .filter(
+                    ConversationMember.conversation_id == ConversationSummary.conversation_id,
+                    ConversationMember.user_id == ConversationSummary.user_id,
+                )
+                .exists()
+            )
+            if user_id is not None:
+                orphans = orphans.filter(ConversationSummary.user_id == user_id)
+            removed = orphans.delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not rebuild conversation summaries",
+            )
+        return {"rebuilt": rebuilt, "removed": removed}
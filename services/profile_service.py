@@ -2,6 +2,7 @@ from fastapi import HTTPException, status, UploadFile
 from db_models.profile import Profile
 from db_models.user import User
 from sqlalchemy.orm import Session
+from core.database import use_replica
 from schemas.profile import ProfileUpdate
 import cloudinary.uploader
 
@@ -11,7 +12,8 @@ class ProfileService:
     @staticmethod
     def get_user_profile(db: Session, user: User) -> Profile:
 
-        profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+        with use_replica(db):
+            profile = db.query(Profile).filter(Profile.user_id == user.id).first()
 
         if not profile:
             raise HTTPException(
@@ -1,5 +1,5 @@
 from core.socket_manager import sio
-from sockets.handlers import handle_connect, handle_disconnect
+from sockets.handlers import handle_connect, handle_disconnect, handle_send_message
 
 
 # Map the event to the handler function
@@ -12,3 +12,8 @@ async def on_connect(sid, environ, auth=None):
 @sio.on("disconnect")
 async def on_disconnect(sid):
     await handle_disconnect(sid)
+
+
+@sio.on("send_message")
+async def on_send_message(sid, data):
+    return await handle_send_message(sid, data)
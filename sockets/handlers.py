@@ -1,6 +1,15 @@
+import asyncio
 from urllib.parse import parse_qs
-from core.socket_manager import sio
+from uuid import UUID
+from fastapi import HTTPException
+from core.socket_manager import sio, user_room
 from core.security import decode_token
+from core.revocation import revocation
+from core.database import SessionLocal
+from core.dedup import send_dedup
+from db_models.user import User
+from schemas.chat import MessageOut
+from services.chat_service import ChatService
 
 
 async def handle_connect(sid, environ, auth):
@@ -22,15 +31,88 @@ async def handle_connect(sid, environ, auth):
     if not payload:
         return False
 
+    if payload.get("type") != "access" or await revocation.is_revoked(payload):
+        return False
+
     user_id = payload.get("sub")
     if not user_id:
         return False
 
     #  Save Session
     await sio.save_session(sid, {"user_id": user_id})
+    await sio.enter_room(sid, user_room(user_id))
     print(f"User {user_id} connected")
     return True
 
 
 async def handle_disconnect(sid):
+    # the manager drops the sid from all its rooms (user room included)
     print(f"Client {sid} disconnected")
+
+
+def _persist_message(user_id: str, conversation_id: UUID, content: str):
+    # runs in a worker thread, the db layer is sync
+    db = SessionLocal()
+    try:
+        db.info["user_id"] = user_id
+        user = db.get(User, UUID(user_id))
+        if user is None:
+            raise HTTPException(status_code=401, detail="Unknown user")
+        message = ChatService.send_message(
+            db=db, user=user, conversation_id=conversation_id, content=content
+        )
+        member_ids = ChatService.get_member_ids(db=db, conversation_id=conversation_id)
+        return MessageOut.model_validate(message).model_dump(mode="json"), member_ids
+    finally:
+        db.close()
+
+
+async def handle_send_message(sid, data):
+    """Persist and fan out a message. The return value is the client's ack.
+
+    ``client_id`` (generated by the client, reused on retries) makes the
+    send idempotent: a retry inside the dedup window gets the original ack
+    back without a second insert or broadcast.
+    """
+    session = await sio.get_session(sid)
+    user_id = session["user_id"]
+
+    if not isinstance(data, dict):
+        return {"ok": False, "error": "invalid payload"}
+    content = data.get("content")
+    client_id = data.get("client_id")
+    try:
+        conversation_id = UUID(str(data.get("conversation_id")))
+    except ValueError:
+        return {"ok": False, "error": "invalid conversation_id"}
+    if not isinstance(content, str) or not content or len(content) > 4000:
+        return {"ok": False, "error": "invalid content"}
+    if client_id is not None and (not isinstance(client_id, str) or len(client_id) > 64):
+        return {"ok": False, "error": "invalid client_id"}
+
+    if client_id:
+        owner, ack = await send_dedup.claim(user_id, client_id)
+        if not owner:
+            return ack or {"ok": False, "error": "in_progress", "client_id": client_id}
+
+    try:
+        message, member_ids = await asyncio.to_thread(
+            _persist_message, user_id, conversation_id, content
+        )
+    except HTTPException as e:
+        if client_id:
+            await send_dedup.release(user_id, client_id)
+        return {"ok": False, "error": e.detail}
+    except Exception:
+        if client_id:
+            await send_dedup.release(user_id, client_id)
+        raise
+
+    ack = {"ok": True, "client_id": client_id, "message": message}
+    if client_id:
+        await send_dedup.complete(user_id, client_id, ack)
+
+    await sio.emit_to_users(
+        "new_message", dict(message, client_id=client_id), user_ids=member_ids
+    )
+    return ack